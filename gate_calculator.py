@@ -1,19 +1,52 @@
 from __future__ import annotations
 
 import argparse
-import math
+import hashlib
+import pickle
 import re
-from dataclasses import dataclass
+import sys
+import threading
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
 
 import httpx
 import pdfplumber
-from bs4 import BeautifulSoup
+import pypdfium2 as pdfium
+from lxml import etree
+
+T = TypeVar("T")
+
+_CACHE_DIR = Path.home() / ".cache" / "gate-checker"
+_CACHE_VERSION = 1
+_TABLE_SETTINGS = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+
+_FILENAME_STRIP_RE = re.compile(r"[^a-z0-9]")
+_MARK_RE = re.compile(
+    r"Q\.\s*(\d+)\s*(?:[–-]|to)\s*Q\.\s*(\d+)\s*Carry\s*(ONE|TWO)\s*marks?\s*Each",
+    re.IGNORECASE,
+)
+_OPT_RE = re.compile(r"([A-D])\s*\.\s*IMG_SRC:([^\s]+)", re.IGNORECASE)
+_FALLBACK_RE = re.compile(r"IMG_SRC:([^\s]+[a-dA-D]\.png)", re.IGNORECASE)
+_QUESTION_HEADER = "Question Type"
+_START_RE = re.compile(
+    re.escape(_QUESTION_HEADER) + r"\s*:\s*(MCQ|MSQ|NAT)\s*Question\s*ID\s*:\s*(\d+)\s*Status\s*:\s*"
+    r"(Not (?:Attempted and Marked For Review|Answered)|Marked For Review|Answered)",
+    re.IGNORECASE,
+)
+_CHOSEN_RE = re.compile(r"Chosen\s*Option\s*:\s*([A-D](?:\s*,\s*[A-D])*)", re.IGNORECASE)
+_GIVEN_RE = re.compile(r"Given\s*Answer\s*:\s*([-+]?\d+(?:\.\d+)?)?", re.IGNORECASE)
+_PNG_RE = re.compile(r"([a-dA-D])(?:v\d+)?\.png(?:\?|$)")
+_NAT_RE = re.compile(r"([-+]?\d+(?:\.\d+)?)\s*to\s*([-+]?\d+(?:\.\d+)?)", re.IGNORECASE)
 
 
 @dataclass
 class AnswerKeyEntry:
+    __slots__ = ("q_no", "q_type", "section", "key_raw")
+
     q_no: int
     q_type: str
     section: str
@@ -22,57 +55,61 @@ class AnswerKeyEntry:
 
 @dataclass
 class ResponseQuestion:
+    __slots__ = ("question_id", "q_type", "status", "chosen_labels", "given_answer", "master_options")
+
     question_id: int
     q_type: str
     status: str
     chosen_labels: List[str]
     given_answer: Optional[float]
-    option_map: Dict[str, str]
+    master_options: Dict[str, str]
 
 
 @dataclass
-class EvaluationRow:
-    q_no: int
-    question_id: int
-    q_type: str
-    status: str
-    student_answer: str
-    correct_answer: str
-    marks: float
-    max_marks: float
+class EvaluationResult:
+    q_no: array = field(default_factory=lambda: array("i"))
+    question_id: array = field(default_factory=lambda: array("q"))
+    q_type: List[str] = field(default_factory=list)
+    status: List[str] = field(default_factory=list)
+    student_answer: List[str] = field(default_factory=list)
+    correct_answer: List[str] = field(default_factory=list)
+    marks: array = field(default_factory=lambda: array("d"))
+    max_marks: array = field(default_factory=lambda: array("d"))
 
 
 def normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", value or "").strip()
+    return " ".join(value.split()) if value else ""
 
 
 def parse_answer_key(answer_key_pdf: Path) -> List[AnswerKeyEntry]:
     entries: List[AnswerKeyEntry] = []
     with pdfplumber.open(answer_key_pdf) as pdf:
         for page in pdf.pages:
-            for table in page.extract_tables() or []:
+            page_has_key_table = False
+            for table in page.extract_tables(table_settings=_TABLE_SETTINGS) or []:
                 if not table or len(table) < 2:
                     continue
                 header = [normalize_space(cell or "") for cell in table[0]]
                 if len(header) < 4 or "Q. No." not in header[0] or "Q. Type" not in header[1]:
                     continue
+                page_has_key_table = True
                 for row in table[1:]:
                     if not row or len(row) < 4:
                         continue
                     q_no_txt = normalize_space(row[0] or "")
-                    q_type = normalize_space(row[1] or "")
-                    section = normalize_space(row[2] or "")
-                    key_raw = normalize_space(row[3] or "")
                     if not q_no_txt.isdigit():
                         continue
                     entries.append(
                         AnswerKeyEntry(
                             q_no=int(q_no_txt),
-                            q_type=q_type.upper(),
-                            section=section,
-                            key_raw=key_raw,
+                            q_type=normalize_space(row[1] or "").upper(),
+                            section=normalize_space(row[2] or ""),
+                            key_raw=normalize_space(row[3] or ""),
                         )
                     )
+            page.close()
+            if entries and not page_has_key_table:
+                break
 
     entries.sort(key=lambda e: e.q_no)
     return entries
@@ -87,49 +124,48 @@ def _mark_word_to_value(word: str) -> Optional[float]:
     return None
 
 
-def parse_mark_scheme(question_paper_pdf: Path, total_questions: int) -> Dict[int, float]:
-    marks: Dict[int, float] = {}
-    pattern = re.compile(
-        r"Q\.\s*(\d+)\s*(?:[–-]|to)\s*Q\.\s*(\d+)\s*Carry\s*(ONE|TWO)\s*marks?\s*Each",
-        re.IGNORECASE,
+def parse_mark_scheme(question_paper_pdf: Path, last_q_no: int) -> array:
+    marks = array(
+        "d",
+        (1.0 if (q_no <= 5 or 11 <= q_no <= 35) else 2.0 for q_no in range(last_q_no + 1)),
     )
-
-    with pdfplumber.open(question_paper_pdf) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for start_txt, end_txt, mark_word in pattern.findall(text):
-                start_q = int(start_txt)
-                end_q = int(end_txt)
+    seen = bytearray(last_q_no + 1)
+    covered = 0
+
+    with pdfium.PdfDocument(str(question_paper_pdf)) as pdf:
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            for start_txt, end_txt, mark_word in _MARK_RE.findall(text):
+                start_q = max(int(start_txt), 1)
+                end_q = min(int(end_txt), last_q_no)
                 mark_val = _mark_word_to_value(mark_word)
-                if mark_val is None:
+                if mark_val is None or start_q > end_q:
                     continue
-                for q_no in range(start_q, end_q + 1):
-                    marks[q_no] = mark_val
-
-    if len(marks) < total_questions:
-        for q_no in range(1, total_questions + 1):
-            if q_no in marks:
-                continue
-            marks[q_no] = 1.0 if (q_no <= 5 or 11 <= q_no <= 35) else 2.0
+                band_size = end_q - start_q + 1
+                marks[start_q : end_q + 1] = array("d", [mark_val]) * band_size
+                covered += band_size - seen.count(1, start_q, end_q + 1)
+                seen[start_q : end_q + 1] = b"\x01" * band_size
+            if covered >= last_q_no:
+                break
 
     return marks
 
 
-def _extract_option_map_from_text(block_text: str) -> Dict[str, str]:
-    option_map: Dict[str, str] = {}
-    for label in ["A", "B", "C", "D"]:
-        pattern = re.compile(
-            rf"{label}\s*\.\s*IMG_SRC:([^\s]+)",
-            re.IGNORECASE,
-        )
-        match = pattern.search(block_text)
-        if match:
-            option_map[label] = match.group(1)
+def _extract_option_map_from_text(block_text: str, pos: int = 0, endpos: Optional[int] = None) -> Dict[str, str]:
+    if endpos is None:
+        endpos = len(block_text)
 
-    if len(option_map) == 4:
-        return option_map
+    option_map: Dict[str, str] = {}
+    for match in _OPT_RE.finditer(block_text, pos, endpos):
+        option_map.setdefault(match.group(1).upper(), match.group(2))
+        if len(option_map) == 4:
+            return option_map
 
-    fallback_urls = re.findall(r"IMG_SRC:([^\s]+[a-dA-D]\.png)", block_text, flags=re.IGNORECASE)
+    fallback_urls = _FALLBACK_RE.findall(block_text, pos, endpos)
     unique_urls: List[str] = []
     seen: Set[str] = set()
     for url in fallback_urls:
@@ -148,6 +184,15 @@ def _extract_option_map_from_text(block_text: str) -> Dict[str, str]:
     return option_map
 
 
+def _map_labels_to_master_options(option_map: Dict[str, str]) -> Dict[str, str]:
+    master_options: Dict[str, str] = {}
+    for label, url in option_map.items():
+        match = _PNG_RE.search(url)
+        if match:
+            master_options[label] = match.group(1).upper()
+    return master_options
+
+
 def _parse_float(value: str) -> Optional[float]:
     try:
         return float(value)
@@ -155,32 +200,78 @@ def _parse_float(value: str) -> Optional[float]:
         return None
 
 
+class _HtmlTextTarget:
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self.parts.append(" ")
+        if tag == "img":
+            self.parts.append(f"IMG_SRC:{attrib.get('src', '')} ")
+        elif tag in {"script", "style"}:
+            self.skip_depth += 1
+
+    def end(self, tag: str) -> None:
+        self.parts.append(" ")
+        if tag in {"script", "style"}:
+            self.skip_depth -= 1
+
+    def data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def comment(self, text: str) -> None:
+        self.parts.append(" ")
+
+    def pi(self, target: str, data: Optional[str] = None) -> None:
+        self.parts.append(" ")
+
+    def close(self) -> str:
+        return normalize_space("".join(self.parts))
+
+
+def _html_text_parser() -> etree.HTMLParser:
+    return etree.HTMLParser(target=_HtmlTextTarget())
+
+
+def _flatten_html(html_text: str) -> str:
+    parser = _html_text_parser()
+    parser.feed(html_text)
+    return parser.close()
+
+
+def _iter_question_headers(flat_text: str) -> Iterator[re.Match[str]]:
+    pos = flat_text.find(_QUESTION_HEADER)
+    while pos >= 0:
+        match = _START_RE.match(flat_text, pos)
+        if match:
+            yield match
+            pos = match.end()
+        else:
+            pos += len(_QUESTION_HEADER)
+        pos = flat_text.find(_QUESTION_HEADER, pos)
+
+
 def parse_response_sheet(html_text: str) -> List[ResponseQuestion]:
-    soup = BeautifulSoup(html_text, "lxml")
-    for img in soup.find_all("img"):
-        src = img.get("src", "")
-        img.replace_with(f" IMG_SRC:{src} ")
+    return _parse_response_text(_flatten_html(html_text))
+
 
-    flat_text = normalize_space(soup.get_text(" "))
-    if "Question Type" not in flat_text:
+def _parse_response_text(flat_text: str) -> List[ResponseQuestion]:
+    if _QUESTION_HEADER not in flat_text:
         return []
 
-    start_pattern = re.compile(
-        r"Question\s*Type\s*:\s*(MCQ|MSQ|NAT)\s*Question\s*ID\s*:\s*(\d+)\s*Status\s*:\s*"
-        r"(Not Attempted and Marked For Review|Marked For Review|Not Answered|Answered)",
-        re.IGNORECASE,
-    )
-    starts = list(start_pattern.finditer(flat_text))
-    if not starts:
+    matches = _iter_question_headers(flat_text)
+    start = next(matches, None)
+    if start is None:
         return []
 
     questions: List[ResponseQuestion] = []
-    for index, start in enumerate(starts):
-        next_start = starts[index + 1].start() if index + 1 < len(starts) else len(flat_text)
-        prev_end = starts[index - 1].end() if index > 0 else 0
-
-        metadata_text = flat_text[start.start() : next_start]
-        content_text = flat_text[prev_end : start.start()]
+    prev_end = 0
+    while start is not None:
+        following = next(matches, None)
+        next_start = following.start() if following is not None else len(flat_text)
+        start_pos = start.start()
 
         q_type = start.group(1).upper()
         question_id = int(start.group(2))
@@ -188,19 +279,23 @@ def parse_response_sheet(html_text: str) -> List[ResponseQuestion]:
 
         chosen_labels: List[str] = []
         if q_type in {"MCQ", "MSQ"}:
-            chosen_match = re.search(r"Chosen\s*Option\s*:\s*([A-D](?:\s*,\s*[A-D])*)", metadata_text, flags=re.IGNORECASE)
+            chosen_match = _CHOSEN_RE.search(flat_text, start_pos, next_start)
             if chosen_match:
                 chosen_labels = [part.strip().upper() for part in chosen_match.group(1).split(",") if part.strip()]
 
         given_answer: Optional[float] = None
         if q_type == "NAT":
-            answer_match = re.search(r"Given\s*Answer\s*:\s*([-+]?\d+(?:\.\d+)?)", content_text, flags=re.IGNORECASE)
+            answer_match = _GIVEN_RE.search(flat_text, prev_end, start_pos)
             if not answer_match:
-                answer_match = re.search(r"Given\s*Answer\s*:\s*([-+]?\d+(?:\.\d+)?)", metadata_text, flags=re.IGNORECASE)
-            if answer_match:
+                answer_match = _GIVEN_RE.search(flat_text, start.end(), next_start)
+            if answer_match and answer_match.group(1):
                 given_answer = _parse_float(answer_match.group(1))
 
-        option_map = _extract_option_map_from_text(content_text) if q_type in {"MCQ", "MSQ"} else {}
+        master_options = (
+            _map_labels_to_master_options(_extract_option_map_from_text(flat_text, prev_end, start_pos))
+            if q_type in {"MCQ", "MSQ"}
+            else {}
+        )
 
         questions.append(
             ResponseQuestion(
@@ -209,45 +304,42 @@ def parse_response_sheet(html_text: str) -> List[ResponseQuestion]:
                 status=status,
                 chosen_labels=chosen_labels,
                 given_answer=given_answer,
-                option_map=option_map,
+                master_options=master_options,
             )
         )
+        prev_end = start.end()
+        start = following
 
     return questions
 
 
-def _label_to_master_option(option_map: Dict[str, str], label: str) -> Optional[str]:
-    if label not in option_map:
-        return None
-    url = option_map[label]
-    match = re.search(r"([a-dA-D])(?:v\d+)?\.png(?:\?|$)", url)
-    if not match:
-        return None
-    return match.group(1).upper()
-
-
 def parse_nat_range(key_raw: str) -> Tuple[Optional[float], Optional[float]]:
-    match = re.search(r"([-+]?\d+(?:\.\d+)?)\s*to\s*([-+]?\d+(?:\.\d+)?)", key_raw, flags=re.IGNORECASE)
+    match = _NAT_RE.search(key_raw)
     if not match:
         return None, None
     return float(match.group(1)), float(match.group(2))
 
 
+def _ordered_by_question_id(response_questions: List[ResponseQuestion]) -> List[ResponseQuestion]:
+    for prev, cur in zip(response_questions, islice(response_questions, 1, None)):
+        if prev.question_id > cur.question_id:
+            return sorted(response_questions, key=lambda q: q.question_id)
+    return response_questions
+
+
 def evaluate(
     answer_key: List[AnswerKeyEntry],
-    mark_scheme: Dict[int, float],
+    mark_scheme: array,
     response_questions: List[ResponseQuestion],
-) -> List[EvaluationRow]:
-    sorted_responses = sorted(response_questions, key=lambda q: q.question_id)
-    if len(sorted_responses) < len(answer_key):
+) -> EvaluationResult:
+    if len(response_questions) < len(answer_key):
         raise ValueError(
-            f"Response sheet has only {len(sorted_responses)} questions, but answer key has {len(answer_key)}."
+            f"Response sheet has only {len(response_questions)} questions, but answer key has {len(answer_key)}."
         )
 
-    rows: List[EvaluationRow] = []
-    for index, key_entry in enumerate(answer_key):
-        response = sorted_responses[index]
-        max_marks = mark_scheme.get(key_entry.q_no, 1.0)
+    result = EvaluationResult()
+    for key_entry, response in zip(answer_key, _ordered_by_question_id(response_questions)):
+        max_marks = mark_scheme[key_entry.q_no] if key_entry.q_no < len(mark_scheme) else 1.0
         earned = 0.0
 
         student_answer = "--"
@@ -255,7 +347,7 @@ def evaluate(
 
         if key_entry.q_type == "MCQ":
             if response.chosen_labels:
-                mapped = _label_to_master_option(response.option_map, response.chosen_labels[0])
+                mapped = response.master_options.get(response.chosen_labels[0])
                 if mapped:
                     student_answer = mapped
                     if mapped == key_entry.key_raw:
@@ -263,12 +355,8 @@ def evaluate(
                     else:
                         earned = -(max_marks / 3.0)
         elif key_entry.q_type == "MSQ":
-            mapped_answers = {
-                mapped
-                for label in response.chosen_labels
-                for mapped in [_label_to_master_option(response.option_map, label)]
-                if mapped
-            }
+            master_options = response.master_options
+            mapped_answers = {master_options[label] for label in response.chosen_labels if label in master_options}
             if mapped_answers:
                 student_answer = ";".join(sorted(mapped_answers))
             correct_set = {item.strip().upper() for item in key_entry.key_raw.split(";") if item.strip()}
@@ -281,51 +369,65 @@ def evaluate(
                 if lo is not None and hi is not None and (lo - 1e-9) <= response.given_answer <= (hi + 1e-9):
                     earned = max_marks
 
-        rows.append(
-            EvaluationRow(
-                q_no=key_entry.q_no,
-                question_id=response.question_id,
-                q_type=key_entry.q_type,
-                status=response.status,
-                student_answer=student_answer,
-                correct_answer=correct_answer,
-                marks=earned,
-                max_marks=max_marks,
-            )
-        )
-
-    return rows
+        result.q_no.append(key_entry.q_no)
+        result.question_id.append(response.question_id)
+        result.q_type.append(key_entry.q_type)
+        result.status.append(response.status)
+        result.student_answer.append(student_answer)
+        result.correct_answer.append(correct_answer)
+        result.marks.append(earned)
+        result.max_marks.append(max_marks)
+
+    return result
+
+
+def print_summary(result: EvaluationResult) -> None:
+    total = 0.0
+    max_total = 0.0
+    one_mark_total = 0.0
+    two_mark_total = 0.0
+    for marks, max_marks in zip(result.marks, result.max_marks):
+        total += marks
+        max_total += max_marks
+        if max_marks == 1.0:
+            one_mark_total += marks
+        elif max_marks == 2.0:
+            two_mark_total += marks
 
-
-def print_summary(rows: List[EvaluationRow]) -> None:
-    total = sum(row.marks for row in rows)
-    max_total = sum(row.max_marks for row in rows)
     print(f"Total Marks: {total:.2f} / {max_total:.2f}")
-
-    one_mark_total = sum(row.marks for row in rows if math.isclose(row.max_marks, 1.0))
-    two_mark_total = sum(row.marks for row in rows if math.isclose(row.max_marks, 2.0))
     print(f"1-mark questions subtotal: {one_mark_total:.2f}")
     print(f"2-mark questions subtotal: {two_mark_total:.2f}")
 
 
-def print_detailed(rows: List[EvaluationRow]) -> None:
-    print("q_no,qid,type,status,student,correct,marks")
-    for row in rows:
-        print(
-            f"{row.q_no},{row.question_id},{row.q_type},"
-            f"{row.status},{row.student_answer},{row.correct_answer},{row.marks:.2f}"
-        )
+def print_detailed(result: EvaluationResult) -> None:
+    lines = ["q_no,qid,type,status,student,correct,marks\n"]
+    for q_no, question_id, q_type, status, student_answer, correct_answer, marks in zip(
+        result.q_no,
+        result.question_id,
+        result.q_type,
+        result.status,
+        result.student_answer,
+        result.correct_answer,
+        result.marks,
+    ):
+        lines.append(f"{q_no},{question_id},{q_type},{status},{student_answer},{correct_answer},{marks:.2f}\n")
+    sys.stdout.write("".join(lines))
 
 
-def fetch_response_html(url: str) -> str:
+def fetch_response_sheet(url: str) -> List[ResponseQuestion]:
     headers = {"User-Agent": "Mozilla/5.0"}
-    response = httpx.get(url, headers=headers, follow_redirects=True, timeout=30)
-    response.raise_for_status()
-    return response.text
+    parser = _html_text_parser()
+    parser.feed("")
+    with httpx.Client(http2=True, headers=headers, follow_redirects=True, timeout=30) as client:
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_text():
+                parser.feed(chunk)
+    return _parse_response_text(parser.close())
 
 
 def _filename_token(name: str) -> str:
-    return re.sub(r"[^a-z0-9]", "", name.lower())
+    return _FILENAME_STRIP_RE.sub("", name.lower())
 
 
 def _find_subject_pdf(sample_dir: Path, subject_code: str, required_token: str) -> Path:
@@ -371,27 +473,69 @@ def resolve_input_pdfs(
     return answer_key_pdf, question_paper_pdf
 
 
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cached_parse(kind: str, pdf_path: Path, parser: Callable[..., T], *args: Any) -> T:
+    key = "-".join([kind, f"v{_CACHE_VERSION}", _file_sha256(pdf_path), *map(str, args)])
+    cache_file = _CACHE_DIR / f"{key}.pkl"
+    if cache_file.exists():
+        try:
+            return pickle.loads(cache_file.read_bytes())
+        except Exception:
+            pass
+
+    value = parser(pdf_path, *args)
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_bytes(pickle.dumps(value))
+        tmp_file.replace(cache_file)
+    except OSError:
+        pass
+    return value
+
+
+def _fetch_in_background(url: str) -> Future:
+    future: Future = Future()
+
+    def worker() -> None:
+        try:
+            future.set_result(fetch_response_sheet(url))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+
 def run(
     answer_key_pdf: Path,
     question_paper_pdf: Path,
     response_sheet_url: str,
     detailed: bool,
 ) -> None:
-    answer_key = parse_answer_key(answer_key_pdf)
+    answer_key = _cached_parse("answer_key", answer_key_pdf, parse_answer_key)
     if not answer_key:
         raise ValueError("Could not parse answer key table.")
 
-    mark_scheme = parse_mark_scheme(question_paper_pdf, total_questions=len(answer_key))
-    html = fetch_response_html(response_sheet_url)
-    responses = parse_response_sheet(html)
+    responses_future = _fetch_in_background(response_sheet_url)
+    mark_scheme = _cached_parse("mark_scheme", question_paper_pdf, parse_mark_scheme, answer_key[-1].q_no)
+    responses = responses_future.result()
+
     if not responses:
         raise ValueError("Could not parse response sheet questions from HTML.")
 
-    rows = evaluate(answer_key, mark_scheme, responses)
+    result = evaluate(answer_key, mark_scheme, responses)
 
     if detailed:
-        print_detailed(rows)
-    print_summary(rows)
+        print_detailed(result)
+    print_summary(result)
 
 
 def build_arg_parser() -> argparse.ArgumentParser: